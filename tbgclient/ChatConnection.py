@@ -1,7 +1,6 @@
 """An implementation of a chat connection."""
 import threading
 import warnings
-import time
 import asyncio
 
 from . import api
@@ -11,6 +10,8 @@ from .Flags import Flags
 from .TBGException import *
 from . import parsers
 
+_EVENT_TYPES = frozenset(("on_error", "on_message", "on_login"))
+
 
 class ChatConnection:
     """Connects to the chat.
@@ -40,6 +41,7 @@ class ChatConnection:
     channelName: str = ""
     flags: Flags = Flags.NONE
     loop: threading.Thread
+    _stopped: threading.Event
     tasks = None
     isAsync: bool = False
     users: dict = None
@@ -48,21 +50,21 @@ class ChatConnection:
     def __init__(self,  **data):
         self.__dict__.update(data)
         self.loop = threading.Thread(name='post', target=self.main_loop, args=tuple(), daemon=True)
+        self._stopped = threading.Event()
         
     def connect(self, channel):
         """Connects to a channel."""
         self.channel = channel
-        if not self.loop.is_alive(): self.loop.start()
+        if not self.loop.is_alive():
+            # arm the loop before it starts, so an early disconnect() isn't undone
+            self.connected = True
+            self._stopped.clear()
+            self.loop.start()
         self.on_login(self.session)
         return self
 
     def main_loop(self):
         """The main loop."""
-        async def do_nothing():
-            """Does nothing."""
-            pass
-        
-        self.connected = True
         self.isAsync = asyncio.iscoroutinefunction(self.on_message)
         if self.isAsync:
             self.tasks = asyncio.new_event_loop()
@@ -77,7 +79,8 @@ class ChatConnection:
                     return
                 self.session.session, req = api.get_message(self.session.session, self.channel, 
                                                             self.lastID, ["channelName"])
-                xml = parsers.default.get_message(req.text)
+                # hand the raw bytes over, the XML parser decodes them itself
+                xml = parsers.default.get_message(req.content)
                 xml["users"] = {k: [User(**x, flags=self.flags, session=self.session) for x in v]
                                 for k, v in xml["users"].items()}
                 xml["messages"] = [Post(**x, flags=self.flags, session=self.session, postType=PostType.CHAT) 
@@ -93,33 +96,31 @@ class ChatConnection:
                         # Make and execute new tasks
                         for x in xml["messages"]:
                             self.tasks.create_task(self.on_message(x))
-                        self.tasks.run_until_complete(do_nothing())
                     else:
                         # Scrub finished threads
-                        finished = []
-                        for i, x in enumerate(self.tasks):
-                            if not x.is_alive():
-                                finished.append(i)
-                        self.tasks = [x for i, x in enumerate(self.tasks) if i not in finished]
+                        self.tasks = [x for x in self.tasks if x.is_alive()]
 
                         # Make and execute new threads
                         for x in xml["messages"]:
-                            self.tasks.append(threading.Thread(name=f"p{x.pID}", target=self.on_message,
-                                                               sargs=(x,), daemon=True))
-                        
-                        for i, x in enumerate(self.tasks):
-                            if not x.is_alive():
-                                self.tasks[i].start()
+                            task = threading.Thread(name=f"p{x.pID}", target=self.on_message,
+                                                    args=(x,), daemon=True)
+                            task.start()
+                            self.tasks.append(task)
                 first = False
 
-                time.sleep(self.refreshRate)
+                if self.isAsync:
+                    # let the handlers run while waiting for the next poll
+                    self.tasks.run_until_complete(asyncio.sleep(self.refreshRate))
+                elif self._stopped.wait(self.refreshRate):
+                    # woken up by disconnect(), no need to sit out the delay
+                    return
         except Exception as e:
             self.on_error(e)
             raise
 
     def set_event(self, etype):
         """Decorates a function to be used as events."""
-        if etype not in ["on_error", "on_message", "on_login"]:
+        if etype not in _EVENT_TYPES:
             raise ValueError(f"Invalid event type: {etype}")
 
         def wrapper(func):
@@ -128,14 +129,14 @@ class ChatConnection:
         return wrapper
 
     def send_message(self, msg):
-        if type(msg) is Post:
+        if isinstance(msg, Post):
             if msg.postType != PostType.CHAT:
                 warnings.warn("Post type is not PostType.CHAT", TBGWarning)
             msg = msg.post
         else:
             msg = str(msg)
         self.session.session, req = api.post_message(self.session.session, msg)
-        xml = parsers.default.get_message(req.text)
+        xml = parsers.default.get_message(req.content)
         xml["messages"] = [Post(**x, flags=self.flags, session=self.session, postType=PostType.CHAT) 
                            for x in xml["messages"]]
         if len(xml["messages"]) != 0: 
@@ -144,8 +145,13 @@ class ChatConnection:
             self.lastID += 1
         return req
 
-    def disconnect(self):
+    def disconnect(self, timeout: float = 5.0):
+        """Stops the main loop and waits up to `timeout` seconds for it to end."""
         self.connected = False
+        self._stopped.set()
+        # handlers may disconnect from inside the loop, which can't join itself
+        if self.loop.is_alive() and self.loop is not threading.current_thread():
+            self.loop.join(timeout)
 
     # These are meant to be user-defined functions.
     def on_error(self, e: Exception):
@@ -5,19 +5,7 @@ from . import parsers, api
 from .Flags import Flags
 from .TBGException import *
 from .Topic import Topic
-import re
-
-
-def _check_error(req, parser):
-    """Checks for errors on the document."""
-    # HACK: Using regex to find list, tbgclient.parsers cannot parse document correctly
-    error = re.findall(r'<div class="inbox error-info">(.+?)</div>', req.text, re.DOTALL)
-    if not error:
-        return None
-    error = re.findall(r'<ul class="error-list">(.+?)</ul>', error[0], re.DOTALL)
-    error = parser.get_elements_by_tag_name(error[0], "strong")
-    error = [re.sub(r"</?[^>]+(>|$)", "", x) for x in error]
-    return error
+import operator
 
 
 class Forum:
@@ -49,10 +37,11 @@ class Forum:
     posts: list
 
     def __init__(self, **data):
+        # only the page size is kept, so take the topics out before storing
+        topics = data.pop("topics", None)
         self.__dict__.update(data)
-        if "topics" in data:
-            self._pageSize = len(self.topics)
-            del self.topics
+        if topics is not None:
+            self._pageSize = len(topics)
         self._pageCache = {}
 
     def __repr__(self):
@@ -69,20 +58,27 @@ class Forum:
         # TODO: Implement topic posting
         return NotImplemented
 
-    def get_page(self, page):
-        """Get posts on a single page."""
+    def _get_page_data(self, page):
+        """Get the parsed topics of a single page, fetching it only once."""
         if self.session is None:
             raise RequestException("Session is missing")
         if page <= 0:
             raise IndexError("Page index out of range")
         if page > self.pages:
             raise IndexError("Page index out of range")
-        if page in self._pageCache:
-            pageData = self._pageCache[page]
-        else:
+        pageData = self._pageCache.get(page)
+        if pageData is None:
             self.session.session, req = api.get_forum(self.session.session, self.fID, page)
             pageData = parsers.default.get_forum_page(req.text)["topics"]
             self._pageCache[page] = pageData
+        if page < self.pages:
+            # every page but the last is full, so this is the page size
+            self._pageSize = len(pageData)
+        return pageData
+
+    def get_page(self, page):
+        """Get posts on a single page."""
+        pageData = self._get_page_data(page)
 
         result = []
         for x in pageData:
@@ -93,16 +89,26 @@ class Forum:
                     topic.update()
                 result.append(topic)
             else:
-                topic = x
+                topic = dict(x)
                 topic["fID"]=self.fID
                 result.append(topic)
         return result
 
+    def _get_page_size(self):
+        """Returns the amount of topics on a full page, fetching the first
+        page once if it is not known yet."""
+        if not self._pageSize:
+            topics = self._get_page_data(1)
+            if not self._pageSize:
+                # single-page forum, every topic is on the first page
+                return len(topics) or 1
+        return self._pageSize
+
     def get_post(self, pNum):
         """Get post on an index."""
         if pNum <= 0:
             raise IndexError("Page index out of range")
-        page, post = divmod(pNum - 1, self._pageSize)
+        page, post = divmod(pNum - 1, self._get_page_size())
         if page >= self.pages:
             raise IndexError("Page index out of range")
         posts = self.get_page(page + 1)
@@ -111,4 +117,10 @@ class Forum:
         return posts[post]
 
     def __getitem__(self, pNum):
-        return self.get_post(pNum + 1)
+        # index() rejects floats and other non-integers up front
+        return self.get_post(operator.index(pNum) + 1)
+
+    def __iter__(self):
+        # build each page once instead of once per item through __getitem__
+        for page in range(1, self.pages + 1):
+            yield from self.get_page(page)
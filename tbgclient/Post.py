@@ -65,21 +65,35 @@ class Post:
     def __repr__(self):
         return f"Post(user={repr(self.user)},pID={repr(self.pID)},text={repr(self.text)},session={repr(self.session)})"
 
-    def update(self, full=True):
+    def update(self, full=True, users=None):
+        """Updates the post.
+
+        users is an optional dict of already fetched users keyed by user ID,
+        so that posts on the same page don't fetch the same poster twice.
+        """
         if self.session is None:
             raise RequestException("Session is missing")
         if full:
             self.session.session, req = api.get_post(self.session.session, self.pID)
             self.__init__(**parsers.default.get_post(req.text, self.pID))
-        if type(self.user) is dict:
+        if isinstance(self.user, dict):
             self.user = User(**self.user, session=self.session, flags=self.flags)
         else:
-            match = re.match(r'<a href=["\']profile\.php\?id=(\d+)["\']>', self.user)
-            if match:
-                self.uID = int(match.group(1))
+            if self.uID is None:
+                # the parser didn't give us the poster's ID, dig it out of the link
+                match = re.match(r'<a href=["\']profile\.php\?id=(\d+)["\']>', self.user)
+                if match:
+                    self.uID = int(match.group(1))
+            if self.uID is not None:
+                user = users.get(self.uID) if users is not None else None
+                if user is not None:
+                    self.user = user
+                    return
                 self.session.session, req = api.get_user(self.session.session, self.uID)
                 if Flags.RAW_DATA not in self.flags:
                     self.user = User(uID=self.uID, **parsers.default.get_user(req.text), flags=self.flags)
                 else:
                     self.user = parsers.default.get_user(req.text)
+                if users is not None:
+                    users[self.uID] = self.user
 
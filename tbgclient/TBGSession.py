@@ -2,6 +2,8 @@
 
 import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from . import api
 from .Flags import Flags
@@ -13,6 +15,10 @@ from .User import User
 from .ChatConnection import ChatConnection
 from . import parsers
 
+_RE_LOGIN_ERROR = re.compile('<p class="conl">(.+)</p>')
+_RE_PROFILE_ID = re.compile(r'profile\.php\?id=(\d*)')
+_RE_NAVPROFILE = re.compile(r'id=["\']navprofile["\'][^>]*>\s*<a href=["\']profile\.php\?id=(\d+)')
+
 
 class TBGSession:
     """An object that defines a TBG session.
@@ -30,6 +36,14 @@ class TBGSession:
         flag will be set.
     flags: tbgclient.Flags
         Flags for the session. See tbgclient.Flags for more information.
+    pool_maxsize: int
+        How many connections to the TBGs are kept alive for reuse. Raise
+        this if the session is shared between many threads. Sessions with
+        the same pool size share one connection pool, so closing one
+        session's requests.Session also drops the others' idle connections.
+        Idempotent requests answered with 502/503/504 are retried up to three
+        times with a short backoff; Retry-After is ignored, so a long
+        maintenance window can't stall the caller.
 
     Variables
     ---------
@@ -43,8 +57,23 @@ class TBGSession:
     password = ""
     uID = None
     flags: Flags = Flags.NONE
+    _adapters: dict = {}
+
+    @classmethod
+    def _get_adapter(cls, pool_maxsize: int):
+        """Returns the HTTPAdapter shared by sessions of this pool size."""
+        adapter = cls._adapters.get(pool_maxsize)
+        if adapter is None:
+            # keep connections to the forums alive and retry when it's overloaded
+            adapter = cls._adapters[pool_maxsize] = HTTPAdapter(
+                pool_maxsize=pool_maxsize,
+                max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                                  respect_retry_after_header=False, raise_on_status=False)
+            )
+        return adapter
 
-    def __init__(self, user: str = None, password: str = None, flags: Flags = Flags.NONE):
+    def __init__(self, user: str = None, password: str = None, flags: Flags = Flags.NONE,
+                 pool_maxsize: int = 10):
         """Initiates the class."""
         self.flags = flags
         if password is None or user is None:
@@ -56,6 +85,8 @@ class TBGSession:
             self.session = api.SessionMultiple()
         else:
             self.session = requests.Session()
+        self.session.hooks["response"].append(api.fix_encoding)
+        self.session.mount("https://", self._get_adapter(pool_maxsize))
         if Flags.NO_LOGIN not in self.flags:
             req = self.login()
 
@@ -129,21 +160,25 @@ class TBGSession:
         """Logs into the TBGs."""
         self.session, req = api.login(self.session, self.user, self.password)
         # verify if you're logged in, for some reason the forums will send 200 even if your user/pass is invalid
-        match = re.findall('<p class="conl">(.+)</p>', req.text)
+        match = _RE_LOGIN_ERROR.findall(req.text)
         if len(match) != 0:
             raise CredentialsException(
                 f"Login failed, you have a faulty credential information. {tuple(match)}"
             )
+        # the page after logging in links to our profile, which saves to_user() a request
+        match = _RE_NAVPROFILE.search(req.text)
+        if match:
+            self.uID = int(match.group(1))
         return req
 
     def to_user(self):
         """Casts TBGSession to User."""
         if self.uID is None:
-            # user id is not defined
+            # user id wasn't found while logging in
             req = self.session.get("https://tbgforums.com/forums/index.php")
             self.uID = parsers.default.get_element_by_id(req.text, "navprofile")
-            self.uID = int(re.findall(r'profile\.php\?id=(\d*)', self.uID)[0])
-        self.get_user(self.uID)
+            self.uID = int(_RE_PROFILE_ID.search(self.uID).group(1))
+        return self.get_user(self.uID)
 
 
 __all__ = ["TBGSession"]
@@ -3,19 +3,21 @@ from . import parsers, api
 from .Flags import Flags
 from .TBGException import *
 from .Post import Post
+import operator
 import re
 
+_RE_ERROR_LIST = re.compile(r'<div class="inbox error-info">.*?<ul class="error-list">(.+?)</ul>', re.DOTALL)
+_RE_ERROR = re.compile(r"<strong[^>]*>(.*?)</strong>", re.DOTALL)
+_RE_TAG = re.compile(r"</?[^>]+(>|$)")
 
-def _check_error(req, parser):
+
+def _check_error(req):
     """Checks for errors on the document."""
     # HACK: Using regex to find list, tbgclient.parsers cannot parse document correctly
-    error = re.findall(r'<div class="inbox error-info">(.+?)</div>', req.text, re.DOTALL)
+    error = _RE_ERROR_LIST.search(req.text)
     if not error:
         return None
-    error = re.findall(r'<ul class="error-list">(.+?)</ul>', error[0], re.DOTALL)
-    error = parser.get_elements_by_tag_name(error[0], "strong")
-    error = [re.sub(r"</?[^>]+(>|$)", "", x) for x in error]
-    return error
+    return [_RE_TAG.sub("", x) for x in _RE_ERROR.findall(error.group(1))]
 
 
 class Topic:
@@ -52,10 +54,11 @@ class Topic:
     posts: list
 
     def __init__(self, **data):
+        # only the page size is kept, so take the posts out before storing
+        posts = data.pop("posts", None)
         self.__dict__.update(data)
-        if "posts" in data:
-            self._pageSize = len(self.posts)
-            del self.posts
+        if posts is not None:
+            self._pageSize = len(posts)
         self._pageCache = {}
 
     def __repr__(self):
@@ -71,10 +74,10 @@ class Topic:
         """Posts a post."""
         if self.session is None:
             raise RequestException("Session is missing")
-        if type(post) == Post:
+        if isinstance(post, Post):
             post = post.to_bbcode()
         self.session.session, req = api.post_post(self.session.session, post, self.tID)
-        error = _check_error(req, parsers.default)
+        error = _check_error(req)
         if error:
             raise TBGException(
                 "The following errors need to be corrected before the message can be posted:\n" +
@@ -82,45 +85,61 @@ class Topic:
             )
         return req
 
-    def get_page(self, page):
-        """Get posts on a single page."""
+    def _get_page_data(self, page):
+        """Get the parsed posts of a single page, fetching it only once."""
         if self.session is None:
             raise RequestException("Session is missing")
         if page <= 0:
             raise IndexError("Page index out of range")
         if page > self.pages:
             raise IndexError("Page index out of range")
-        if page in self._pageCache:
-            pageData = self._pageCache[page]
-        else:
+        pageData = self._pageCache.get(page)
+        if pageData is None:
             self.session.session, req = api.get_topic(self.session.session, self.tID, page)
-            if page != self.pages and self._pageSize == 0:
-                self._pageSize = len(self.posts)
-            pageData = parsers.default.get_page(req.text)["posts"]
+            # cache the parsed posts, not their HTML, so hits skip the parser
+            pageData = [parsers.default.get_post(x) for x in parsers.default.get_page(req.text)["posts"]]
             self._pageCache[page] = pageData
-        
-        posts = [parsers.default.get_post(x) for x in pageData]
+        if page < self.pages:
+            # every page but the last is full, so this is the page size
+            self._pageSize = len(pageData)
+        return pageData
+
+    def get_page(self, page):
+        """Get posts on a single page."""
+        pageData = self._get_page_data(page)
+
         result = []
-        for x in posts:
+        users = {}  # posters tend to repeat on a page, fetch each only once
+        for x in pageData:
             if Flags.RAW_DATA not in self.flags:
                 post = Post(**x, session=self.session)
                 post.tID=self.tID
                 post.fID=self.fID
                 if Flags.NO_INIT not in self.flags:
-                    post.update()
+                    post.update(users=users)
                 result.append(post)
             else: 
-                post = x
+                post = dict(x)
                 post["tID"]=self.tID
                 post["fID"]=self.fID
                 result.append(post)
         return result
 
+    def _get_page_size(self):
+        """Returns the amount of posts on a full page, fetching the first
+        page once if it is not known yet."""
+        if not self._pageSize:
+            posts = self._get_page_data(1)
+            if not self._pageSize:
+                # single-page topic, every post is on the first page
+                return len(posts) or 1
+        return self._pageSize
+
     def get_post(self, pNum):
         """Get post on an index."""
         if pNum <= 0:
             raise IndexError("Post index out of range")
-        page, post = divmod(pNum - 1, self._pageSize)
+        page, post = divmod(pNum - 1, self._get_page_size())
         if page >= self.pages:
             raise IndexError("Post index out of range")
         posts = self.get_page(page + 1)
@@ -129,5 +148,11 @@ class Topic:
         return posts[post]
         
     def __getitem__(self, pNum):
-        return self.get_post(pNum + 1)
+        # index() rejects floats and other non-integers up front
+        return self.get_post(operator.index(pNum) + 1)
+
+    def __iter__(self):
+        # build each page once instead of once per item through __getitem__
+        for page in range(1, self.pages + 1):
+            yield from self.get_page(page)
 
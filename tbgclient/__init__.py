@@ -9,7 +9,8 @@ from .Post import Post
 from .User import User
 from .Flags import Flags
 from .TBGException import TBGException
-from .TBGSession import TBGSession
+
+__all__ = ["TBGSession", "Post", "User", "Flags", "TBGException"]
 
 """
 Future modules.
@@ -2,10 +2,12 @@
 
 This is a modified copy of tbg-scraper's parsers."""
 __all__ = "html lxml".split()
+import warnings
+from tbgclient.TBGException import TBGWarning
 from tbgclient.parsers import html
 default = html
 try:
     from tbgclient.parsers import lxml
     default = lxml
-except:
-    print("Cannot use lxml, using html instead")
+except ImportError:
+    warnings.warn("Cannot use lxml, using html instead", TBGWarning)
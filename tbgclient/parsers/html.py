@@ -5,6 +5,27 @@ import warnings
 
 # Too many violations: not gonna attempt to comply PEP 8
 
+_RE_INNER = re.compile(r">(.+)<")
+_RE_PAGE = re.compile(r"\d+")
+_RE_CLASS = re.compile("class='(.+?)'")
+_RE_NUMBER = re.compile(r"(\d+)")
+_RE_UID = re.compile(r"profile\.php\?id=(\d+)")
+_RE_FIELD = re.compile(r"<dt ?.*?>(.*?)</dt>\s*<dd ?.*?>(.*?)</dd>")
+
+# Thousands separators used by the different FluxBB language packs
+_SEPARATORS = str.maketrans("", "", ",. '\u00a0")
+_MONTHS = {x: i for i, x in enumerate("Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split(), 1)}
+
+# Profile labels that map straight to a plain text field
+_USER_FIELDS = {"Username": "username", "Title": "title", "Location": "location", "Real name": "realname"}
+# Social labels, in order of precedence (the last one present wins)
+_SOCIAL_FIELDS = ("Jabber", "ICQ", "MSN Messenger", "AOL IM", "Yahoo! Messenger")
+
+
+class _SearchDone(Exception):
+    """Stops HTMLSearch from feeding the rest of the document."""
+    pass
+
 
 class HTMLSearch(HTMLParser):
     """A tool to filter/find elements in a HTML document."""
@@ -12,7 +33,7 @@ class HTMLSearch(HTMLParser):
     text=""
     found=None
     layers=0
-    result=""
+    parts=[]
     search=""
     results=[]
     multiple=False
@@ -24,9 +45,10 @@ class HTMLSearch(HTMLParser):
         HTMLParser.__init__(self)
 
     def resetSettings(self):
+        self.reset()  # drop leftovers of a search that stopped early
         self.found=None
         self.layers=0
-        self.result=""
+        self.parts=[]
         self.search=""
         self.searchIn="attrs"
         self.results=[]
@@ -37,8 +59,11 @@ class HTMLSearch(HTMLParser):
         self.resetSettings()
         self.search=id
         self.tag="id"
-        self.feed(self.text)
-        return HTMLSearch(self.result)
+        try:
+            self.feed(self.text)
+        except _SearchDone:
+            pass
+        return HTMLSearch("".join(self.parts))
 
     def getElementsByClass(self, klas: str):
         self.resetSettings()
@@ -65,44 +90,77 @@ class HTMLSearch(HTMLParser):
         return [HTMLSearch(x) for x in self.results]
 
     def handle_starttag(self, tag, attrs):
-        attrs=dict(attrs)
         if not self.found:
             if self.searchIn == "attrs":
-                if self.tag in attrs:
+                # only attribute searches need a lookup, the rest use the pairs as-is
+                value = dict(attrs).get(self.tag)
+                if value is not None:
                     # HACK: using self.tag to classify search mode
-                    match = (self.search in attrs[self.tag].split() and self.tag=="class") or\
-                            (attrs[self.tag] == self.search and not self.tag=="class")
+                    match = (self.search in value.split() and self.tag=="class") or\
+                            (value == self.search and not self.tag=="class")
                     if match:
                         self.found=tag
-                        self.result=""
+                        self.parts=[]
             elif self.searchIn == "tag":
                 if self.search == tag:
                     self.found=tag
-                    self.result=""
+                    self.parts=[]
             elif self.searchIn == "child":
                 if self.disable: self.disable=False
                 else:
                     self.found = tag
-                    self.result = ""
+                    self.parts = []
             else: raise ValueError("What is "+self.searchIn)
         if self.found:
-            self.result+=f"<{tag}{''.join(' %s=%s'%(x,repr(attrs[x])) for x in attrs)}>"
+            self.parts.append(f"<{tag}{''.join(' %s=%r' % x for x in attrs)}>")
             if self.found==tag:
                 self.layers+=1
 
     def handle_endtag(self, tag):
-        if self.found:self.result+=f"</{tag}>"
+        if self.found:self.parts.append(f"</{tag}>")
         if self.found==tag:
             self.layers-=1
             if self.layers<=0:
                 self.found=None
-                if self.multiple: self.results.append(self.result)
+                # pieces are collected in a list, joining once avoids quadratic +=
+                if self.multiple: self.results.append("".join(self.parts))
+                else: raise _SearchDone
 
     def handle_data(self, data):
-        if self.found:self.result+=data
+        if self.found:self.parts.append(data)
 
     def innerHTML(self):
-        return HTMLSearch(re.search(r">(.+)<", self.text).group(1))
+        return HTMLSearch(_RE_INNER.search(self.text).group(1))
+
+
+def parse_integer(text):
+    """Parses a formatted number (1,234) into an int."""
+    return int(text.translate(_SEPARATORS))
+
+
+def parse_date(text):
+    """Parses a FluxBB date (2021-Jan-05).
+
+    The format is fixed, so it's split by hand instead of going through
+    the (slow, locale-dependent) strptime."""
+    year, month, day = text.split("-")
+    return datetime.date(int(year), _MONTHS[month], int(day))
+
+
+def parse_post_time(text):
+    """Parses a post time (2021-Jan-05 12:34:56, Today 12:34:56, etc.) into
+    its string form."""
+    date, time = text.split(" ")
+    hour, minute, second = time.strip("\u2009").split(":")
+    time = datetime.time(int(hour), int(minute), int(second))
+    if date == "Today":
+        time = datetime.datetime.combine(datetime.datetime.now().date(), time)
+    elif date == "Yesterday":
+        time = datetime.datetime.combine(datetime.datetime.now().date(), time)
+        time += datetime.timedelta(days=-1)
+    else:
+        time = datetime.datetime.combine(parse_date(date), time)
+    return str(time)
 
 
 def get_post(document, pid=None):
@@ -110,36 +168,34 @@ def get_post(document, pid=None):
     document = HTMLSearch(document)
     topic, text, forum, user, pid = (None,) * 5  # le init
     if pid is not None:
-        if document.getElementByID("msg").text:
-            post = document.getElementByID("msg")
-            return {"rawHTML": post.text, "pid": pid, "tid": None, "fid": None, "user": None, "text": None, "time": None}
-        topic = document.getElementsByClass("crumbs")[0].getElementsByTagName("a")[-1].text
+        # every HTMLSearch query re-feeds the whole document, so look things up once
+        msg = document.getElementByID("msg")
+        if msg.text:
+            return {"rawHTML": msg.text, "pid": pid, "tid": None, "fid": None, "user": None, "text": None, "time": None}
+        crumbs = document.getElementsByClass("crumbs")[0].getElementsByTagName("a")
+        topic = crumbs[-1].text
         topic = int(re.sub(r"""<a href=['"]viewtopic\.php\?id=(\d*)['"]>(?:.*)</a>""",r"\1",topic))
-        forum = document.getElementsByClass("crumbs")[0].getElementsByTagName("a")[-2].text
+        forum = crumbs[-2].text
         forum = int(re.sub(r"""<a href=['"]viewforum\.php\?id=(\d*)['"]>(?:.*)</a>""",r"\1",forum))
         post = document.getElementByID(f"p{pid}")
     else:
         post = document
         pid = int(re.search(r"p(\d+)", document.text).group(1))
-    text, time = (None, None)
+    text, time, uid = (None, None, None)
     user = post.getElementsByTagName("dl")
     if user:
         user = user[0].getElementsByTagName("dt")[0].text
         user = re.sub(r"<dt *><strong *>(.*)</strong></dt>",r"\1",user)
+        match = _RE_UID.search(user)
+        if match:
+            uid = int(match.group(1))
         text = "".join(x.text for x in post.getElementsByClass("postmsg")[0].getElementsByTagName("p"))
         time = post.getElementsByTagName("a")[0].text
-        time = re.search(r">(.*)<",time).group(1).split(" ")
-        time[1] = datetime.datetime.strptime(time[1],"\u2009%H:%M:%S").time()
-        if time[0] == "Today": time = datetime.datetime.combine(datetime.datetime.now().date(),time[1])
-        elif time[0] == "Yesterday":
-            time = datetime.datetime.combine(datetime.datetime.now().date(),time[1])
-            time += datetime.timedelta(days=-1)
-        else: time = datetime.datetime.combine(datetime.datetime.strptime(time[0],"%Y-%b-%d").date(),time[1])
-        time = str(time)
+        time = parse_post_time(re.search(r">(.*)<",time).group(1))
     else:
         warnings.warn("Cannot find post ID in document",RuntimeWarning)
         user=None
-    return {"rawHTML": post.text, "pID": pid, "tID": topic, "fID": forum, "user": user, "text": text, "time": time}
+    return {"rawHTML": post.text, "pID": pid, "tID": topic, "fID": forum, "uID": uid, "user": user, "text": text, "time": time}
 
 
 def get_element_by_id(document, id):
@@ -147,11 +203,11 @@ def get_element_by_id(document, id):
 
 
 def get_elements_by_class(document, klas):
-    return [x.text for x in HTMLSearch(document).getElementsByClass(id)]
+    return [x.text for x in HTMLSearch(document).getElementsByClass(klas)]
 
 
 def get_elements_by_tag_name(document, tag):
-    return [x.text for x in HTMLSearch(document).getElementsByTagName(id)]
+    return [x.text for x in HTMLSearch(document).getElementsByTagName(tag)]
 
 
 def get_user(document):
@@ -161,40 +217,25 @@ def get_user(document):
         raise NotImplementedError
     a = a.getElementsByTagName("fieldset")
     a = [x.getElementsByTagName("dl")[0].text for x in a]
-    k = [[y.group(2) for y in re.finditer(r"<(dt) ?.*?>(.*?)</\1>", x)] for x in a]
-    v = [[y.group(2) for y in re.finditer(r"<(dd) ?.*?>(.*?)</\1>", x)] for x in a]
-    a = [{p: q for p, q in zip(x, y)} for x, y in zip(k, v)]
-    a = {k: v for x in a for k, v in x.items()}
+    a = {k: v for x in a for k, v in _RE_FIELD.findall(x)}
 
     r = {}
     s = {}
-    if "Username" in a:
-        r["username"] = a["Username"]
-    if "Title" in a:
-        r["title"] = a["Title"]
-    if "Location" in a:
-        r["location"] = a["Location"]
+    for label, key in _USER_FIELDS.items():
+        if label in a:
+            r[key] = a[label]
     if "Website" in a:
         r["website"] = HTMLSearch(a["Website"]).getElementsByTagName("a")[0].innerHTML().text
     if "Signature" in a:
         r["signature"] = re.findall(">(.*)<", a["Signature"])[0]
-    if "Real name" in a:
-        r["realname"] = a["Real name"]
     if "Posts" in a:
-        r["postcount"] = int(a["Posts"].split(" - ")[0].replace(",", ""))
+        r["postcount"] = parse_integer(a["Posts"].split(" - ")[0])
     if "Registered" in a:
-        r["registered"] = datetime.datetime.strptime(a["Registered"], "%Y-%b-%d").date()
-
-    if "Jabber" in a:
-        s = a["Jabber"]
-    if "ICQ" in a:
-        s = a["ICQ"]
-    if "MSN Messenger" in a:
-        s = a["MSN Messenger"]
-    if "AOL IM" in a:
-        s = a["AOL IM"]
-    if "Yahoo! Messenger" in a:
-        s = a["Yahoo! Messenger"]
+        r["registered"] = parse_date(a["Registered"])
+
+    for label in _SOCIAL_FIELDS:
+        if label in a:
+            s = a[label]
     r["social"] = s
     return r
 
@@ -205,22 +246,24 @@ def get_page(document):
     raw = document.getElementByID("brdmain")
     topic, name, forum, pages, posts = (None,) * 5  # le init
     if document.getElementByID("msg").text == "":
-        topic = document.getElementsByClass("crumbs")[0].getElementsByTagName("a")[-1].text
+        crumbs = document.getElementsByClass("crumbs")[0].getElementsByTagName("a")
+        topic = crumbs[-1].text
         match = re.findall(r"""href=['"]viewtopic\.php\?id=(\d*)(?:.*?)['"]>(.*)</a>""",topic)
         if match:
             topic, name = match[0]
             topic = int(topic)
-            name = re.search(r">(.+)<", name).group(1)
+            name = _RE_INNER.search(name).group(1)
         else:
             topic = None
-        forum = document.getElementsByClass("crumbs")[0].getElementsByTagName("a")[-2].text
+        forum = crumbs[-2].text
         match = re.findall(r"""href=['"]viewforum\.php\?id=(\d*)(?:.*?)['"]>.*</a>""",forum)
         if match:
             forum = int(match[0])
         header = document.getElementsByClass(f"pagelink")[0].getChildNodes()
-        pages = [x.innerHTML().text for x in header]
-        pages = sorted(int(x) for x in pages if re.match(r"\d+", x))[-1]
-        posts = [x.text for x in raw.getChildNodes() if "link" not in re.search("class='(.+?)'", x.text)[0]]
+        # page links are in order, so the last number is the page count
+        pages = (x.innerHTML().text for x in reversed(header))
+        pages = next(int(x) for x in pages if _RE_PAGE.match(x))
+        posts = [x.text for x in raw.getChildNodes() if "link" not in _RE_CLASS.search(x.text)[0]]
     return {"rawHTML": raw.text, "tID": topic, "fID": forum, "pages": pages, "posts": posts, "title": name}
 
 
@@ -239,8 +282,7 @@ def get_message(xml):
     if userlist is not None:
         for x in userlist:
             channel = x.get("channelID")
-            if channel not in users: users[channel] = []
-            users[channel].append({"uID": x.get("userID"), "username": x.text})
+            users.setdefault(channel, []).append({"uID": x.get("userID"), "username": x.text})
 
     messages = {}
     if msglist is not None:
@@ -265,7 +307,7 @@ def get_forum_page(document):
         match = re.findall(r"""href=['"]viewforum\.php\?id=(\d*)(?:.*?)['"]>(.*)</a>""",forum)
         if match:
             forum = int(match[0][0])
-            name = re.search(r">(.+)<", match[0][1]).group(1)
+            name = _RE_INNER.search(match[0][1]).group(1)
         else:
             forum, name = (None,)*2
         result = []
@@ -273,17 +315,19 @@ def get_forum_page(document):
             data = row.getElementsByTagName("td")
             link = data[0].getElementsByTagName("a")[0]
             title = link.innerHTML().text
-            tid = int(re.findall(r"(\d+)",link.text)[0].replace(",",""))
-            posts = int(data[1].innerHTML().text.replace(",",""))+1
-            views = int(data[2].innerHTML().text.replace(",",""))
-            lastPost = int(re.findall(r"(\d+)",data[3].innerHTML().text)[0].replace(",",""))
+            tid = int(_RE_NUMBER.search(link.text).group(1))
+            posts = parse_integer(data[1].innerHTML().text)+1
+            views = parse_integer(data[2].innerHTML().text)
+            lastPost = int(_RE_NUMBER.search(data[3].innerHTML().text).group(1))
             result.append({"title": title, "tID": tid, "postCount": posts, "views": views, "lastPost": lastPost})
 
         header = document.getElementsByClass(f"pagelink")[0].getChildNodes()
-        pages = [x.innerHTML().text for x in header]
-        pages = sorted(int(x) for x in pages if re.match(r"\d+", x))[-1]
+        pages = (x.innerHTML().text for x in reversed(header))
+        pages = next(int(x) for x in pages if _RE_PAGE.match(x))
         return {"rawHTML": table.text, "topics": result, "pages": pages, "fID": forum, "title": name}
     else:
         return {"rawHTML": table.text, "topics": None, "pages": None, "fID": None, "title": None}
 
-__all__ = dir(globals())
+__all__ = ["HTMLSearch", "parse_integer", "parse_date", "parse_post_time", "get_post",
+           "get_element_by_id", "get_elements_by_class", "get_elements_by_tag_name", "get_user",
+           "get_page", "get_message", "get_forum_page"]
@@ -1,13 +1,45 @@
-import datetime, re
+import re
 import warnings
 from lxml import etree
+from .html import parse_integer, parse_date, parse_post_time
+from .html import _RE_UID, _RE_PAGE, _USER_FIELDS, _SOCIAL_FIELDS
+# the chat response is tiny XML, the stdlib (C-accelerated) ElementTree
+# parser handles it just as well as lxml
+from .html import get_message
+
+_RE_TID = re.compile(r"viewtopic\.php\?id=(\d+)")
+_RE_FID = re.compile(r"viewforum\.php\?id=(\d+)")
+_RE_PID = re.compile(r"viewtopic\.php\?pid=(\d+)")
+
+# Every post shares the same FluxBB markup, so the lookups are compiled once
+_XP_POST_USER = etree.XPath("(.//dl)[1]/descendant::dt[1]/*[1]")
+_XP_POST_MSG = etree.XPath("descendant::div[@class='postmsg'][1]")
+_XP_POST_LINK = etree.XPath("descendant::a[@href][1]")
+# links of the first breadcrumb list (there's another one at the bottom)
+_XP_CRUMBS = etree.XPath("(.//ul[@class='crumbs'])[1]//a[@href]")
+# the id/class are passed as XPath variables, so these compile only once
+_XP_BY_ID = etree.XPath("(.//*[@id=$id])[1]")
+_XP_BY_CLASS = etree.XPath(".//*[@class=$klas]")
+
+
+def inner_html(element):
+    """Serializes the contents of an element, without its own tags."""
+    if len(element) == 0 and not element.text:
+        return ""
+    # serialize once and cut the outer tags off, instead of joining children
+    html = etree.tostring(element, with_tail=False).decode()
+    return html[html.index(">") + 1:html.rindex("</")]
 
 
 def get_post(document, pid=None):
     """Get post data using lxml."""
     # get the post
-    document = etree.HTML(document)
-    raw, tid, fid, user, text, time = (None,)*6 # le init
+    if pid is None:
+        # a single post from get_page, take the post element out of <html><body>
+        document = etree.HTML(document)[0][0]
+    else:
+        document = etree.HTML(document)
+    raw, tid, fid, uid, user, text, time = (None,)*7 # le init
 
     err = document.find(".//div[@id='msg']")
     if err is not None:
@@ -15,46 +47,41 @@ def get_post(document, pid=None):
     else:
         if pid is not None:
             # Check the "header"
-            header = document.find(".//ul[@class='crumbs']").findall(".//a[@href]")
-            tid = int(re.search(r"(\d+)", list(header[-1].values())[0]).group(1))
-            fid = int(re.search(r"(\d+)", list(header[-2].values())[0]).group(1))
+            header = _XP_CRUMBS(document)
+            tid = int(_RE_TID.search(header[-1].get("href")).group(1))
+            fid = int(_RE_FID.search(header[-2].get("href")).group(1))
 
             # Check the post
             post = document.find(f".//div[@id='p{pid}']")
         else:
             post = document
-            pid = int(document[0][0].get("id")[1:])
+            pid = int(document.get("id")[1:])
 
         if post is not None:
-            user = etree.tostring(post.find(".//dl").find(".//dt")[0]).decode()[8:-9]
-            text = etree.tostring(post.find(".//div[@class='postmsg']")).decode()
-            text = re.search(r">(.*)</d",text,re.DOTALL).group(1).strip()
-            time = post.find(".//a[@href]").text.split(" ")
-            time[1] = datetime.datetime.strptime(time[1], "\u2009%H:%M:%S").time()
-            if time[0] == "Today":
-                time = datetime.datetime.combine(datetime.datetime.now().date(), time[1])
-            elif time[0] == "Yesterday": 
-                time = datetime.datetime.combine(datetime.datetime.now().date(), time[1])
-                time += datetime.timedelta(days=-1)
-            else:
-                time = datetime.datetime.combine(datetime.datetime.strptime(time[0], "%Y-%b-%d").date(), time[1])
-            time = str(time)
-            raw = etree.tostring(post).decode()
+            user = _XP_POST_USER(post)[0]
+            link = user.find("a")
+            if link is not None:
+                match = _RE_UID.search(link.get("href"))
+                if match:
+                    uid = int(match.group(1))
+            user = inner_html(user)
+            text = inner_html(_XP_POST_MSG(post)[0]).strip()
+            time = parse_post_time(_XP_POST_LINK(post)[0].text)
+            raw = etree.tostring(post, with_tail=False).decode()
         else:
             warnings.warn("Cannot find post ID in document", RuntimeWarning)
-    return {"rawHTML": raw, "pID": pid, "tID": tid, "fID": fid, "user": user, "text": text, "time": time}
+    return {"rawHTML": raw, "pID": pid, "tID": tid, "fID": fid, "uID": uid, "user": user, "text": text, "time": time}
 
 
 def get_element_by_id(document, id):
-    document = etree.HTML(document).find(".//*[@id=%s]" % repr(id))
-    if document is not None:
-        return etree.tostring(document).decode()
+    document = _XP_BY_ID(etree.HTML(document), id=id)
+    if document:
+        return etree.tostring(document[0]).decode()
 
 
 def get_elements_by_class(document, klas):
-    document = etree.HTML(document).findall(".//*[@class=%s]" % repr(klas))
-    if document is not None:
-        return [etree.tostring(x).decode() for x in document]
+    document = _XP_BY_CLASS(etree.HTML(document), klas=klas)
+    return [etree.tostring(x).decode() for x in document]
 
 
 def get_elements_by_tag_name(document, tag):
@@ -68,42 +95,35 @@ def get_user(document):
     if a.findall('.//div[@class="blockmenu"]'): 
         # TODO: Parse current user's page
         raise NotImplementedError
-    a = a.findall(".//fieldset")
-    a = [x.find(".//dl") for x in a]
-    k = [x[::2] for x in a] # labels
-    v = [x[1::2] for x in a] # values
-    a = [{p.text: q for p, q in zip(x, y)} for x, y in zip(k, v)] # zipper
-    a = {k: v for x in a for k, v in x.items()} # to dict
+    fields = {}
+    for x in a.findall(".//fieldset"):
+        # pair each label with its value in a single pass over the list
+        label = None
+        for y in x.find(".//dl"):
+            if y.tag == "dt":
+                label = y.text
+            elif y.tag == "dd" and label is not None:
+                fields[label] = y
+                label = None
+    a = fields
 
     r = {}
     s = {}
-    if "Username" in a:
-        r["username"] = a["Username"].text
-    if "Title" in a:
-        r["title"] = a["Title"].text
-    if "Location" in a:
-        r["location"] = a["Location"].text
+    for label, key in _USER_FIELDS.items():
+        if label in a:
+            r[key] = a[label].text
     if "Website" in a:
         r["website"] = a["Website"][0][0].get("href")
     if "Signature" in a:
-        r["signature"] = "".join(etree.tostring(x).decode() for x in a["Signature"][0])
-    if "Real name" in a:
-        r["realname"] = a["Real name"].text
+        r["signature"] = inner_html(a["Signature"][0])
     if "Posts" in a:
-        r["postcount"] = int(a["Posts"].text[:-3].replace(",", ""))
+        r["postcount"] = parse_integer(a["Posts"].text[:-3])
     if "Registered" in a:
-        r["registered"] = datetime.datetime.strptime(a["Registered"].text, "%Y-%b-%d").date()
-
-    if "Jabber" in a:
-        s = a["Jabber"].text
-    if "ICQ" in a:
-        s = a["ICQ"].text
-    if "MSN Messenger" in a:
-        s = a["MSN Messenger"].text
-    if "AOL IM" in a:
-        s = a["AOL IM"].text
-    if "Yahoo! Messenger" in a:
-        s = a["Yahoo! Messenger"].text
+        r["registered"] = parse_date(a["Registered"].text)
+
+    for label in _SOCIAL_FIELDS:
+        if label in a:
+            s = a[label].text
     r["social"] = s
     return r
 
@@ -118,65 +138,35 @@ def get_page(document):
     err = document.find(".//div[@id='msg']")
     if err is None:
         # Check the "header"
-        header = document.find(".//ul[@class='crumbs']").findall(".//a[@href]")
-        match = re.search(r"(\d+)", list(header[-1].values())[0])
+        header = _XP_CRUMBS(document)
+        topic, forum = header[-1], header[-2]
+        match = _RE_TID.search(topic.get("href"))
         if match:
             tid = int(match.group(1))
-        match = re.search(r"(\d+)", list(header[-2].values())[0])
+        match = _RE_FID.search(forum.get("href"))
         if match:
             fid = int(match.group(1))
-        if header[-1].text is None:
-            name = header[-1][0].text
+        if topic.text is None:
+            name = topic[0].text
         else: 
-            name = header[-1].text
+            name = topic.text
 
         # Check the page count
         header = document.find(".//p[@class='pagelink conl']")
         if header is not None:
-            pages = sorted(int(x.text) for x in header if re.match(r"\d+", x.text))[-1]
+            pages = next(int(x.text) for x in reversed(header) if x.text and _RE_PAGE.match(x.text))
 
         # Check the post
-        if "id" in raw[1]: # 
-            posts = [etree.tostring(x) for x in raw if re.match(r"p\d+", x.get("id") if x.get("id") is not None else "")]
-        else:
-            posts = [etree.tostring(x) for x in raw if "link" not in x.get("class")]
+        # posts are the children of #brdmain with an id of p<post ID>
+        posts = []
+        for x in raw:
+            id = x.get("id")
+            if id is not None and id.startswith("p") and id[1:].isdigit():
+                posts.append(etree.tostring(x))
         
     return {"rawHTML": etree.tostring(raw), "tID": tid, "fID": fid, "pages": pages, "posts": posts, "title": name}
 
 
-def get_message(xml):
-    """Get page data using lxml."""
-    # it's literally copy-pasted from html.py
-    # well the comment ruined it but you know what I mean
-    xml = etree.XML(xml.encode())
-
-    info = xml.find("infos")
-    userlist = xml.find("users")
-    msglist = xml.find("messages")
-
-    if info is not None:
-        info = {x.get("type"): x.text for x in info}
-
-    users = {}
-    if userlist is not None:
-        for x in userlist:
-            channel = x.get("channelID")
-            if channel not in users: users[channel] = []
-            users[channel].append({"uID": x.get("userID"), "username": x.text})
-
-    messages = {}
-    if msglist is not None:
-        messages = [{
-                        "pID": x.get("id"), 
-                        "user": {"uID": x.get("userID"), "username": x[0].text.strip()},
-                        "text": x[1].text.strip(),
-                        "rawHTML": etree.tostring(x).decode(),
-                        "time": datetime.datetime.strptime(x.get("dateTime"), "%a, %d %b %Y %H:%M:%S %z")
-                    }
-                    for x in msglist]
-    return {"messages": messages, "info": info, "users": users}
-
-
 def get_forum_page(document):
     document = etree.HTML(document)
     err = document.find(".//div[@id='msg']")
@@ -185,32 +175,35 @@ def get_forum_page(document):
         rows = table.findall("tr")
         
         # Get the header
-        header = document.find(".//ul[@class='crumbs']").findall(".//a[@href]")
-        match = re.search(r"(\d+)", list(header[-1].values())[0])
+        header = _XP_CRUMBS(document)
+        forum = header[-1]
+        match = _RE_FID.search(forum.get("href"))
         if match:
             fid = int(match.group(1))
         else:
             fid = None
-        if header[-1].text is None:
-            name = header[-1][0].text
+        if forum.text is None:
+            name = forum[0].text
         else: 
-            name = header[-1].text
+            name = forum.text
         
         # Get all topics
         result = []
         for row in rows:
+            # walk the cells once instead of searching the row for each column
+            cells = {x.get("class"): x for x in row.iterchildren("td")}
             link = row.xpath(".//a[contains(@href,'viewtopic')]")[0]
             title = link.text
-            tid = int(re.findall(r"(\d+)",link.get("href"))[0].replace(",",""))
-            posts = int(row.find("./td[@class='tc2']").text.replace(",",""))+1
-            views = int(row.find("./td[@class='tc3']").text.replace(",",""))
-            lastPost = int(re.findall(r"(\d+)",row.find("./td[@class='tcr']/a").get("href"))[0])
+            tid = int(_RE_TID.search(link.get("href")).group(1))
+            posts = parse_integer(cells["tc2"].text)+1
+            views = parse_integer(cells["tc3"].text)
+            lastPost = int(_RE_PID.search(cells["tcr"].find("a").get("href")).group(1))
             result.append({"title": title, "tID": tid, "postCount": posts, "views": views, "lastPost": lastPost})
 
         # Check the page count
         header = document.find(".//p[@class='pagelink conl']")
         if header is not None:
-            pages = sorted(int(x.text) for x in header if re.match(r"\d+", x.text))[-1]
+            pages = next(int(x.text) for x in reversed(header) if x.text and _RE_PAGE.match(x.text))
         return {"rawHTML": etree.tostring(table), "topics": result, "pages": pages, "fID": fid, "title": name}
     else:
         return {"rawHTML": etree.tostring(table), "topics": None, "pages": None, "fID": None, "title": name}
@@ -218,4 +211,5 @@ def get_forum_page(document):
 
 
 
-__all__ = dir(globals())
+__all__ = ["inner_html", "get_post", "get_element_by_id", "get_elements_by_class", "get_elements_by_tag_name",
+           "get_user", "get_page", "get_message", "get_forum_page"]